@@ -1,49 +1,236 @@
+import hashlib
 import sqlite3
-from datetime import datetime
-from typing import Optional, List, Dict, Tuple, Union
-from flask import Flask, request, jsonify
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, List, Dict, Set, Tuple, Union
+
+import orjson
+from flask import Flask, Response, request, stream_with_context
+from flask.json.provider import JSONProvider
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - pyahocorasick опционален
+    ahocorasick = None
 
-app = Flask(__name__)
 DATABASE = "reviews.db"
+CONNECTION_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA cache_size=-65536;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=5000;
+"""
+STATEMENT_CACHE_SIZE = 256
+
+# Время создания в формате ISO 8601 (UTC), вычисляется на стороне SQLite
+_SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+_SQL_INSERT_VALUES = f"(?, ?, {_SQL_NOW})"
+_SQL_INSERT = (
+    f"INSERT INTO reviews (text, sentiment, created_at) VALUES {_SQL_INSERT_VALUES} "
+    "RETURNING id, created_at"
+)
+# Строк в одном многострочном INSERT (по 2 параметра на строку,
+# с запасом под старый лимит SQLITE_MAX_VARIABLE_NUMBER=999)
+BATCH_INSERT_SIZE = 400
+# Текст многострочного INSERT один и тот же для всех полных пачек,
+# поэтому в кэше подготовленных запросов он занимает одну запись
+_SQL_INSERT_BATCH = (
+    "INSERT INTO reviews (text, sentiment, created_at) VALUES "
+    + ", ".join([_SQL_INSERT_VALUES] * BATCH_INSERT_SIZE)
+    + " RETURNING id, created_at"
+)
+_SQL_SELECT = "SELECT id, text, sentiment, created_at FROM reviews"
+_SQL_SELECT_BY_SENTIMENT = _SQL_SELECT + " WHERE sentiment = ?"
+_SQL_DELETE = "DELETE FROM reviews WHERE id = ?"
+_SQL_VERSION = "SELECT version FROM reviews_version"
+_SQL_BUMP_VERSION = "UPDATE reviews_version SET version = version + 1"
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    JSON-провайдер Flask на базе orjson.
+
+    Атрибуты sort_keys и compact повторяют DefaultJSONProvider, но по
+    умолчанию ключи не сортируются и вывод всегда компактный.
+    """
+
+    mimetype = "application/json"
+    sort_keys = False
+    compact = True
+
+    def _option(self) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if not self.compact:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, option=self._option())
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+
+def _by_length(words: Set[str]) -> Tuple[str, ...]:
+    """Упорядочивает слова от длинных к коротким (при равной длине - по алфавиту)."""
+
+    return tuple(sorted(words, key=lambda word: (-len(word), word)))
+
+
+POSITIVE_WORDS = _by_length({
+    "хорош", "хорошо", "отличн", "прекрасн", "люблю",
+    "нравится", "супер", "класс", "восхитительн", "лучш",
+    "замечательн", "превосходн", "удобн", "рекомендую", "доволен",
+    "великолепн", "безупречн", "идеальн", "прекрасно", "отлично"
+})
+NEGATIVE_WORDS = _by_length({
+    "плох", "плохо", "ужасн", "ненавиж", "отвратительн",
+    "кошмар", "разочарован", "неудобн", "худш", "недостаток",
+    "проблем", "недостат", "недоволен", "некачествен", "ужасно",
+    "недоволь", "отвратно", "отвратительно", "мерзост", "неприятн", "не нравится"
+})
+NEGATIVE_PHRASES = _by_length({"не нравится", "не люблю", "не хочу"})
+
+
+def _build_automaton(positive: Tuple[str, ...], negative: Tuple[str, ...], phrases: Tuple[str, ...]) -> Optional[Any]:
+    """
+    Собирает автомат Ахо-Корасик по всем ключевым словам анализатора.
+
+    :param positive: Позитивные ключевые слова.
+    :param negative: Негативные ключевые слова.
+    :param phrases: Отрицательные фразы с "не" (имеют наивысший приоритет).
+    :return: Готовый к поиску автомат, значения - метки 'pos'/'neg'/'phrase';
+        None, если pyahocorasick не установлен.
+    """
+
+    if ahocorasick is None:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for tag, words in (("neg", negative), ("pos", positive), ("phrase", phrases)):
+        for word in words:
+            automaton.add_word(word, tag)
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_scanner(positive: Tuple[str, ...], negative: Tuple[str, ...], phrases: Tuple[str, ...]) -> Callable[[str], str]:
+    """
+    Генерирует функцию поиска с ключевыми словами, вшитыми литералами.
+
+    Используется, когда pyahocorasick не установлен: цепочка проверок
+    вида `'хорош' in t` обходится без цикла по множеству слов.
+
+    :param positive: Позитивные ключевые слова.
+    :param negative: Негативные ключевые слова.
+    :param phrases: Отрицательные фразы с "не" (имеют наивысший приоритет).
+    :return: Функция, принимающая текст в нижнем регистре и возвращающая тональность.
+    """
+
+    def condition(words: Tuple[str, ...]) -> str:
+        return " or ".join(f"{word!r} in t" for word in words) or "False"
+
+    source = "\n".join([
+        "def _scan(t):",
+        f"    if {condition(phrases)}: return 'negative'",
+        f"    if {condition(positive)}: return 'positive'",
+        f"    if {condition(negative)}: return 'negative'",
+        "    return 'neutral'",
+    ])
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, "<sentiment-scanner>", "exec"), namespace)
+    return namespace["_scan"]
+
+
+_AUTOMATON = _build_automaton(POSITIVE_WORDS, NEGATIVE_WORDS, NEGATIVE_PHRASES)
+_SCAN = _build_scanner(POSITIVE_WORDS, NEGATIVE_WORDS, NEGATIVE_PHRASES)
+# Первые буквы всех ключевых слов: если ни одной нет в тексте,
+# совпадений быть не может и поиск можно пропустить
+_FIRST_CHARS = frozenset(word[0] for word in POSITIVE_WORDS + NEGATIVE_WORDS + NEGATIVE_PHRASES)
 
 
 class SentimentAnalyzer:
     """Анализатор тональности текста на основе ключевых слов."""
 
-    POSITIVE_WORDS = {
-        "хорош", "хорошо", "отличн", "прекрасн", "люблю",
-        "нравится", "супер", "класс", "восхитительн", "лучш",
-        "замечательн", "превосходн", "удобн", "рекомендую", "доволен",
-        "великолепн", "безупречн", "идеальн", "прекрасно", "отлично"
-    }
-    NEGATIVE_WORDS = {
-        "плох", "плохо", "ужасн", "ненавиж", "отвратительн",
-        "кошмар", "разочарован", "неудобн", "худш", "недостаток",
-        "проблем", "недостат", "недоволен", "некачествен", "ужасно",
-        "недоволь", "отвратно", "отвратительно", "мерзост", "неприятн", "не нравится"
-    }
+    POSITIVE_WORDS = POSITIVE_WORDS
+    NEGATIVE_WORDS = NEGATIVE_WORDS
+    NEGATIVE_PHRASES = NEGATIVE_PHRASES
 
     @classmethod
     def analyze(cls, text: str) -> str:
         if not isinstance(text, str):
             raise ValueError("Text must be a string")
 
-        if not text.strip():
-            return "neutral"
+        return cls.analyze_unchecked(text)
 
+    @staticmethod
+    def analyze_unchecked(text: str) -> str:
+        """
+        Определяет тональность без проверки аргумента.
+
+        Для вызывающего кода, который уже проверил вход сам (например,
+        ReviewService). Вызывающий код гарантирует, что text - строка. Пустой текст и
+        текст из пробелов не содержат ключевых слов и дают 'neutral'.
+        """
+
+        # Поиск идет по str, а не по UTF-8 bytes: и автомат, и `in` работают
+        # со строками напрямую, а encode() + поиск по байтам оказывается
+        # медленнее для кириллицы. str.lower() тоже быстрее, чем
+        # str.translate() с таблицей только для А-Я/A-Z
         text_lower = text.lower()
 
-        # Проверка на отрицательные фразы с "не"
-        negative_phrases = {"не нравится", "не люблю", "не хочу"}
-        if any(phrase in text_lower for phrase in negative_phrases):
-            return "negative"
+        if _FIRST_CHARS.isdisjoint(text_lower):
+            return "neutral"
 
-        if any(word in text_lower for word in cls.POSITIVE_WORDS):
+        if _AUTOMATON is None:
+            return _SCAN(text_lower)
+
+        # Один проход автомата вместо поиска каждого слова по отдельности.
+        # Приоритет: фразы с "не" > позитивные слова > негативные слова.
+        has_positive = has_negative = False
+        for _, tag in _AUTOMATON.iter(text_lower):
+            if tag == "phrase":
+                return "negative"
+            if tag == "pos":
+                has_positive = True
+            else:
+                has_negative = True
+
+        if has_positive:
             return "positive"
-        if any(word in text_lower for word in cls.NEGATIVE_WORDS):
+        if has_negative:
             return "negative"
         return "neutral"
 
+    @classmethod
+    def analyze_batch(cls, texts: List[str]) -> List[str]:
+        """
+        Определяет тональность для списка уже проверенных текстов.
+
+        Как и analyze_unchecked, не проверяет элементы: вызывающий код
+        гарантирует, что все они - строки.
+
+        :param texts: Тексты для анализа.
+        :return: Тональности в том же порядке.
+        """
+
+        analyze = cls.analyze_unchecked
+        return [analyze(text) for text in texts]
+
 
 class ReviewRepository:
     """
@@ -59,20 +246,95 @@ class ReviewRepository:
         """
 
         self.db_path = db_path
+        self._local = threading.local()
         self._init_db()
 
+    def _conn(self) -> sqlite3.Connection:
+        """
+        Возвращает долгоживущее соединение текущего потока.
+
+        Соединение создается лениво при первом обращении, PRAGMA уровня
+        соединения применяются к нему один раз.
+
+        :return: Настроенное соединение в режиме autocommit.
+        """
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                isolation_level=None,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+            conn.executescript(CONNECTION_PRAGMAS)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Выполняет блок в явной транзакции BEGIN IMMEDIATE.
+
+        Если блок изменил данные, версия данных увеличивается один раз
+        в той же транзакции.
+
+        :return: Соединение с открытой транзакцией.
+        """
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            changes = conn.total_changes
+            yield conn
+            if conn.total_changes != changes:
+                conn.execute(_SQL_BUMP_VERSION)
+            conn.execute("COMMIT")
+        except BaseException:
+            # SQLite мог уже откатить транзакцию сам; иначе откатываем,
+            # чтобы не оставить открытую транзакцию на соединении потока
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        """Закрывает соединение текущего потока, если оно было открыто."""
+
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
     def _init_db(self) -> None:
-        """Создает таблицу отзывов при отсутствии."""
-
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS reviews (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    text TEXT NOT NULL,
-                    sentiment TEXT NOT NULL,
-                    created_at TEXT NOT NULL
-                )
-            """)
+        """Включает WAL и создает таблицу отзывов и индексы при отсутствии."""
+
+        conn = self._conn()
+        # journal_mode=WAL сохраняется в файле БД, достаточно одного раза
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS reviews (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                text TEXT NOT NULL,
+                sentiment TEXT NOT NULL,
+                created_at TEXT NOT NULL DEFAULT ({_SQL_NOW})
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_sentiment ON reviews(sentiment)")
+        # Версия данных хранится в самой БД, чтобы изменения были видны
+        # всем процессам и потокам; увеличивается в _transaction()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS reviews_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO reviews_version (id, version) VALUES (1, 0);
+            DROP TRIGGER IF EXISTS reviews_version_insert;
+            DROP TRIGGER IF EXISTS reviews_version_update;
+            DROP TRIGGER IF EXISTS reviews_version_delete;
+        """)
+        # Соединение не должно переживать fork (gunicorn preload_app),
+        # каждый поток воркера откроет свое при первом запросе
+        self.close()
 
     def create(self, text: str, sentiment: str) -> Dict[str, Union[str, int]]:
         """
@@ -85,19 +347,50 @@ class ReviewRepository:
         :raises sqlite3.Error: При ошибках работы с БД.
         """
 
-        created_at = datetime.utcnow().isoformat()
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO reviews (text, sentiment, created_at) VALUES (?, ?, ?)",
-                (text, sentiment, created_at)
-            )
-            return {
-                "id": cursor.lastrowid,
+        with self._transaction() as conn:
+            review_id, created_at = conn.execute(_SQL_INSERT, (text, sentiment)).fetchone()
+
+        return {
+            "id": review_id,
+            "text": text,
+            "sentiment": sentiment,
+            "created_at": created_at
+        }
+
+    def create_many(self, items: List[Tuple[str, str]]) -> List[Dict[str, Union[str, int]]]:
+        """
+        Создает несколько отзывов одной транзакцией.
+
+        :param items: Список пар (текст, тональность).
+        :return: Созданные отзывы в исходном порядке.
+
+        :raises sqlite3.Error: При ошибках работы с БД.
+        """
+
+        if not items:
+            return []
+
+        created = []
+        full = len(items) - len(items) % BATCH_INSERT_SIZE
+        with self._transaction() as conn:
+            for start in range(0, full, BATCH_INSERT_SIZE):
+                chunk = items[start:start + BATCH_INSERT_SIZE]
+                params = [value for item in chunk for value in item]
+                # Порядок строк RETURNING не гарантирован, ID выдаются по порядку VALUES
+                created.extend(sorted(conn.execute(_SQL_INSERT_BATCH, params).fetchall()))
+            # Остаток вставляется по одной строке тем же запросом, что и create()
+            for item in items[full:]:
+                created.append(conn.execute(_SQL_INSERT, item).fetchone())
+
+        return [
+            {
+                "id": review_id,
                 "text": text,
                 "sentiment": sentiment,
                 "created_at": created_at
             }
+            for (text, sentiment), (review_id, created_at) in zip(items, created)
+        ]
 
     def find_all(self, sentiment: Optional[str] = None) -> List[Dict[str, Union[str, int]]]:
         """
@@ -109,15 +402,44 @@ class ReviewRepository:
         :raises sqlite3.Error: При ошибках чтения.
         """
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            query = "SELECT * FROM reviews"
-            params = ()
-            if sentiment:
-                query += " WHERE sentiment = ?"
-                params = (sentiment,)
+        return list(self.find_all_iter(sentiment))
+
+    def find_all_iter(self, sentiment: Optional[str] = None) -> Iterator[Dict[str, Union[str, int]]]:
+        """
+        Лениво выдает отзывы по одному, не загружая всю выборку в память.
+
+        :param sentiment: Опциональный фильтр ('positive'/'negative'/'neutral').
+        :return: Итератор по отзывам.
+
+        :raises sqlite3.Error: При ошибках чтения.
+        """
+
+        cursor = self._conn().cursor()
+        query, params = _SQL_SELECT, ()
+        if sentiment:
+            query, params = _SQL_SELECT_BY_SENTIMENT, (sentiment,)
+
+        try:
+            for review_id, text, review_sentiment, created_at in cursor.execute(query, params):
+                yield {
+                    "id": review_id,
+                    "text": text,
+                    "sentiment": review_sentiment,
+                    "created_at": created_at
+                }
+        finally:
+            cursor.close()
+
+    def version(self) -> int:
+        """
+        Возвращает версию данных, увеличиваемую при каждом изменении отзывов.
 
-            return [dict(row) for row in conn.execute(query, params).fetchall()]
+        :return: Номер версии.
+
+        :raises sqlite3.Error: При ошибках чтения.
+        """
+
+        return self._conn().execute(_SQL_VERSION).fetchone()[0]
 
     def delete(self, review_id: int) -> bool:
         """
@@ -129,9 +451,9 @@ class ReviewRepository:
         :raises sqlite3.Error: При ошибках удаления.
         """
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM reviews WHERE id = ?", (review_id,))
+            cursor.execute(_SQL_DELETE, (review_id,))
 
             return cursor.rowcount > 0
 
@@ -167,10 +489,30 @@ class ReviewService:
         if not isinstance(text, str) or not text.strip():
             raise ValueError("Text must be a non-empty string")
 
-        sentiment = self.analyzer.analyze(text)
+        sentiment = self.analyzer.analyze_unchecked(text)
 
         return self.repository.create(text, sentiment)
 
+    def create_reviews(self, texts: List[str]) -> List[Dict[str, Union[str, int]]]:
+        """
+        Создает пакет отзывов с анализом тональности одной записью в БД.
+
+        :param texts: Тексты отзывов.
+        :return: Созданные отзывы.
+
+        :raises ValueError: При пустом тексте любого из отзывов
+        :raises sqlite3.Error: При ошибках сохранения
+        """
+
+        if not isinstance(texts, list):
+            raise ValueError("Texts must be a list of strings")
+        if not all(isinstance(text, str) and text.strip() for text in texts):
+            raise ValueError("Text must be a non-empty string")
+
+        items = list(zip(texts, self.analyzer.analyze_batch(texts)))
+
+        return self.repository.create_many(items)
+
     def get_reviews(self, sentiment: Optional[str] = None) -> List[Dict[str, Union[str, int]]]:
         """
         Возвращает отзывы с возможной фильтрацией.
@@ -183,6 +525,29 @@ class ReviewService:
 
         return self.repository.find_all(sentiment)
 
+    def iter_reviews(self, sentiment: Optional[str] = None) -> Iterator[Dict[str, Union[str, int]]]:
+        """
+        Возвращает отзывы потоком, по одному.
+
+        :param sentiment: Опциональный фильтр тональности.
+        :return: Итератор по отзывам.
+
+        :raises sqlite3.Error: При ошибках чтения.
+        """
+
+        return self.repository.find_all_iter(sentiment)
+
+    def get_version(self) -> int:
+        """
+        Возвращает текущую версию данных отзывов.
+
+        :return: Номер версии, растущий при любом изменении отзывов.
+
+        :raises sqlite3.Error: При ошибках чтения.
+        """
+
+        return self.repository.version()
+
     def delete_review(self, review_id: int) -> bool:
         """
         Удаляет отзыв по ID.
@@ -196,13 +561,46 @@ class ReviewService:
         return self.repository.delete(review_id)
 
 
+def reviews_etag(version: int, sentiment: Optional[str]) -> str:
+    """
+    Строит ETag списка отзывов из версии данных и фильтра.
+
+    Значение фильтра приходит от клиента как есть, поэтому в ETag
+    попадают только известные тональности, а остальное - как хэш:
+    заголовок должен оставаться ASCII без кавычек.
+
+    :param version: Версия данных.
+    :param sentiment: Фильтр тональности из запроса.
+    :return: Значение ETag без кавычек.
+    """
+
+    if not sentiment:
+        key = "all"
+    elif sentiment in ("positive", "negative", "neutral"):
+        key = sentiment
+    else:
+        key = hashlib.blake2s(sentiment.encode("utf-8"), digest_size=8).hexdigest()
+    return f"{version}-{key}"
+
+
+def json_response(payload: Any) -> Response:
+    """
+    Сериализует payload JSON-провайдером приложения сразу в bytes.
+
+    :param payload: Данные для ответа.
+    :return: JSON-ответ Flask.
+    """
+
+    return app.json.response(payload)
+
+
 repository = ReviewRepository()
 analyzer = SentimentAnalyzer()
 service = ReviewService(repository, analyzer)
 
 
 @app.route("/reviews", methods=["POST"])
-def add_review() -> Tuple[Dict, int]:
+def add_review() -> Tuple[Response, int]:
     """
     Обрабатывает POST-запрос для создания отзыва.
 
@@ -215,24 +613,54 @@ def add_review() -> Tuple[Dict, int]:
     """
 
     if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
+        return json_response({"error": "Content-Type must be application/json"}), 400
 
     try:
         data = request.get_json()
         if not data or "text" not in data:
-            return jsonify({"error": "Field 'text' is required"}), 400
+            return json_response({"error": "Field 'text' is required"}), 400
 
         review = service.create_review(data["text"])
-        return jsonify(review), 201
+        return json_response(review), 201
+
+    except ValueError as e:
+        return json_response({"error": str(e)}), 400
+    except Exception:
+        return json_response({"error": "Internal server error"}), 500
+
+
+@app.route("/reviews/batch", methods=["POST"])
+def add_reviews_batch() -> Tuple[Response, int]:
+    """
+    Обрабатывает POST-запрос для пакетного создания отзывов.
+
+    :return: Кортеж (JSON-ответ, HTTP-статус).
+
+    Пример запроса:
+        POST /reviews/batch
+        Content-Type: application/json
+        {"texts": ["Отличный продукт!", "Ужасная доставка"]}
+    """
+
+    if not request.is_json:
+        return json_response({"error": "Content-Type must be application/json"}), 400
+
+    try:
+        data = request.get_json()
+        if not data or "texts" not in data:
+            return json_response({"error": "Field 'texts' is required"}), 400
+
+        reviews = service.create_reviews(data["texts"])
+        return json_response(reviews), 201
 
     except ValueError as e:
-        return jsonify({"error": str(e)}), 400
+        return json_response({"error": str(e)}), 400
     except Exception:
-        return jsonify({"error": "Internal server error"}), 500
+        return json_response({"error": "Internal server error"}), 500
 
 
 @app.route("/reviews", methods=["GET"])
-def get_reviews() -> Tuple[Dict, int]:
+def get_reviews() -> Tuple[Response, int]:
     """
     Обрабатывает GET-запрос для получения отзывов.
 
@@ -247,15 +675,38 @@ def get_reviews() -> Tuple[Dict, int]:
 
     sentiment = request.args.get("sentiment")
     try:
-        reviews = service.get_reviews(sentiment)
-        return jsonify(reviews), 200
+        etag = reviews_etag(service.get_version(), sentiment)
+        # Данные не менялись с прошлого ответа клиенту: БД не читаем
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag, weak=True)
+            return response, 304
+
+        reviews = service.iter_reviews(sentiment)
+        # Первую строку читаем заранее, чтобы ошибки БД вернулись как 500
+        first = next(reviews, None)
+
+        dumps = app.json.dumps_bytes
+
+        def _gen() -> Iterator[bytes]:
+            yield b"["
+            if first is not None:
+                yield dumps(first)
+                for review in reviews:
+                    yield b","
+                    yield dumps(review)
+            yield b"]"
+
+        response = Response(stream_with_context(_gen()), mimetype="application/json")
+        response.set_etag(etag, weak=True)
+        return response, 200
 
     except Exception:
-        return jsonify({"error": "Internal server error"}), 500
+        return json_response({"error": "Internal server error"}), 500
 
 
 @app.route("/reviews/<int:review_id>", methods=["DELETE"])
-def delete_review(review_id: int) -> Tuple[Dict, int]:
+def delete_review(review_id: int) -> Tuple[Response, int]:
     """
     Обрабатывает DELETE-запрос для удаления отзыва.
 
@@ -269,31 +720,31 @@ def delete_review(review_id: int) -> Tuple[Dict, int]:
 
     try:
         if not isinstance(review_id, int) or review_id <= 0:
-            return jsonify({"error": "Review ID must be a positive integer"}), 400
+            return json_response({"error": "Review ID must be a positive integer"}), 400
 
         if service.delete_review(review_id):
             app.logger.info(f"Successfully deleted review ID {review_id}")
-            return jsonify({
+            return json_response({
                 "message": f"Review with ID {review_id} deleted successfully",
                 "deleted_id": review_id
             }), 200
 
         app.logger.warning(f"Review ID {review_id} not found for deletion")
-        return jsonify({
+        return json_response({
             "error": f"Review with ID {review_id} not found",
             "requested_id": review_id
         }), 404
 
     except sqlite3.Error as e:
         app.logger.error(f"Database error while deleting review {review_id}: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": "Database operation failed",
             "details": str(e)
         }), 500
 
     except Exception as e:
         app.logger.error(f"Unexpected error deleting review {review_id}: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": "Internal server error",
             "details": str(e)
         }), 500
@@ -0,0 +1,12 @@
+import multiprocessing
+import os
+
+bind = "0.0.0.0:5000"
+worker_class = "gthread"
+workers = multiprocessing.cpu_count()
+# sqlite3 отпускает GIL на время запроса к БД, поэтому пока один поток
+# ждет fsync при COMMIT, остальные потоки воркера обслуживают запросы
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+# Приложение импортируется один раз в мастер-процессе: автомат анализатора
+# и прочие структуры, собранные при импорте, разделяются воркерами через fork
+preload_app = True
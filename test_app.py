@@ -1,14 +1,18 @@
 import json
 import os
+import sqlite3
+import threading
 from unittest.mock import patch
 
 import pytest
 
 from app import (
+    BATCH_INSERT_SIZE,
     SentimentAnalyzer,
     ReviewRepository,
     ReviewService,
     app,
+    _SQL_SELECT_BY_SENTIMENT,
 )
 
 
@@ -26,7 +30,9 @@ def test_db(tmp_path):
 def repo(test_db):
     """Фикстура для тестового репозитория."""
 
-    return ReviewRepository(test_db)
+    repository = ReviewRepository(test_db)
+    yield repository
+    repository.close()
 
 
 @pytest.fixture
@@ -67,6 +73,30 @@ class TestSentimentAnalyzer:
         assert analyzer.analyze("Это обычный продукт") == "neutral"
         assert analyzer.analyze("") == "neutral"
         assert analyzer.analyze("123") == "neutral"
+        assert analyzer.analyze("   ") == "neutral"
+
+    def test_analyze_precedence(self, analyzer):
+        assert analyzer.analyze("Хороший сервис, но не люблю упаковку") == "negative"
+        assert analyzer.analyze("Удобно, но есть проблемы") == "positive"
+        assert analyzer.analyze("ПЛОХОЕ КАЧЕСТВО") == "negative"
+
+    def test_analyze_without_automaton(self, analyzer):
+        with patch("app._AUTOMATON", None):
+            assert analyzer.analyze("Это отличный продукт!") == "positive"
+            assert analyzer.analyze("Мне очень не нравится") == "negative"
+            assert analyzer.analyze("Удобно, но есть проблемы") == "positive"
+            assert analyzer.analyze("Отвратительное качество") == "negative"
+            assert analyzer.analyze("Это обычный продукт") == "neutral"
+
+    def test_analyze_batch(self, analyzer):
+        texts = ["Это отличный продукт!", "Это ужасный продукт!", "Это обычный продукт", ""]
+        assert analyzer.analyze_batch(texts) == ["positive", "negative", "neutral", "neutral"]
+        assert analyzer.analyze_batch([]) == []
+
+    def test_analyze_prefilter(self, analyzer):
+        with patch("app._AUTOMATON") as automaton:
+            assert analyzer.analyze("Great product, 10/10") == "neutral"
+            automaton.iter.assert_not_called()
 
     def test_analyze_invalid_input(self, analyzer):
         with pytest.raises(ValueError):
@@ -76,12 +106,39 @@ class TestSentimentAnalyzer:
 
 
 class TestReviewRepository:
+    def test_wal_enabled(self, repo, test_db):
+        with sqlite3.connect(test_db) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_sentiment_filter_uses_index(self, repo):
+        plan = repo._conn().execute(
+            "EXPLAIN QUERY PLAN " + _SQL_SELECT_BY_SENTIMENT, ("positive",)
+        ).fetchall()
+        assert any("idx_reviews_sentiment" in row[-1] for row in plan)
+
     def test_create_review(self, repo):
         review = repo.create("Тестовый отзыв", "neutral")
         assert review["id"] == 1
         assert review["text"] == "Тестовый отзыв"
         assert review["sentiment"] == "neutral"
         assert isinstance(review["created_at"], str)
+        assert review["created_at"].endswith("Z")
+        assert repo.find_all()[0]["created_at"] == review["created_at"]
+
+    def test_create_many(self, repo):
+        repo.create("Первый", "neutral")
+        reviews = repo.create_many([("Второй", "positive"), ("Третий", "negative")])
+        assert [r["id"] for r in reviews] == [2, 3]
+        assert [r["sentiment"] for r in reviews] == ["positive", "negative"]
+        assert [r["text"] for r in repo.find_all()] == ["Первый", "Второй", "Третий"]
+        assert repo.create_many([]) == []
+
+    def test_create_many_multiple_chunks(self, repo):
+        count = BATCH_INSERT_SIZE * 2 + 1
+        reviews = repo.create_many([(f"Отзыв {i}", "neutral") for i in range(count)])
+        assert [r["id"] for r in reviews] == list(range(1, count + 1))
+        assert [r["text"] for r in reviews] == [f"Отзыв {i}" for i in range(count)]
+        assert len(repo.find_all()) == count
 
     def test_find_all(self, repo):
         repo.create("Позитивный", "positive")
@@ -94,6 +151,69 @@ class TestReviewRepository:
         assert len(positive) == 1
         assert positive[0]["sentiment"] == "positive"
 
+    def test_transaction_commit_failure(self, repo):
+        conn = repo._conn()
+        conn.executescript("""
+            CREATE TABLE parent (id INTEGER PRIMARY KEY);
+            CREATE TABLE child (
+                parent_id INTEGER REFERENCES parent(id) DEFERRABLE INITIALLY DEFERRED
+            );
+            PRAGMA foreign_keys=ON;
+        """)
+        with pytest.raises(sqlite3.IntegrityError):
+            with repo._transaction() as conn:
+                conn.execute("INSERT INTO child (parent_id) VALUES (1)")
+
+        assert not conn.in_transaction
+        assert repo.create("После ошибки", "neutral")["text"] == "После ошибки"
+
+    def test_find_all_iter(self, repo):
+        repo.create("Позитивный", "positive")
+        repo.create("Негативный", "negative")
+
+        reviews = repo.find_all_iter("negative")
+        assert not isinstance(reviews, list)
+        assert [r["text"] for r in reviews] == ["Негативный"]
+
+    def test_connection_reused_per_thread(self, repo):
+        assert repo._conn() is repo._conn()
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(repo._conn()))
+        thread.start()
+        thread.join()
+        assert other[0] is not repo._conn()
+
+    def test_transaction_rollback(self, repo):
+        with pytest.raises(sqlite3.Error):
+            with repo._transaction() as conn:
+                conn.execute(
+                    "INSERT INTO reviews (text, sentiment, created_at) VALUES (?, ?, ?)",
+                    ("Откат", "neutral", "2025-01-01T00:00:00")
+                )
+                conn.execute("INSERT INTO missing_table VALUES (1)")
+        assert repo.find_all() == []
+
+    def test_version_changes_on_write(self, repo):
+        initial = repo.version()
+        review = repo.create("Тестовый отзыв", "neutral")
+        after_create = repo.version()
+        assert after_create > initial
+
+        repo.create_many([("Первый", "neutral"), ("Второй", "neutral")])
+        after_batch = repo.version()
+        assert after_batch > after_create
+
+        repo.create_many([(f"Отзыв {i}", "neutral") for i in range(BATCH_INSERT_SIZE + 1)])
+        assert repo.version() == after_batch + 1
+        after_batch = repo.version()
+
+        repo.delete(review["id"])
+        after_delete = repo.version()
+        assert after_delete == after_batch + 1
+        repo.delete(999)
+        assert repo.version() == after_delete
+
     def test_delete_review(self, repo):
         review = repo.create("Тестовый отзыв", "neutral")
         assert repo.delete(review["id"]) is True
@@ -102,7 +222,7 @@ class TestReviewRepository:
 
 class TestReviewService:
     def test_create_review(self, service):
-        with patch.object(service.analyzer, 'analyze', return_value='positive'):
+        with patch.object(service.analyzer, 'analyze_unchecked', return_value='positive'):
             review = service.create_review("Хороший продукт")
             assert review["sentiment"] == "positive"
             assert review["text"] == "Хороший продукт"
@@ -113,6 +233,23 @@ class TestReviewService:
         with pytest.raises(ValueError):
             service.create_review(None)
 
+    def test_create_reviews(self, service):
+        reviews = service.create_reviews(["Отличный продукт", "Ужасный продукт"])
+        assert [r["sentiment"] for r in reviews] == ["positive", "negative"]
+
+    def test_create_reviews_invalid(self, service):
+        with pytest.raises(ValueError):
+            service.create_reviews(["Нормально", ""])
+        with pytest.raises(ValueError):
+            service.create_reviews("Не список")
+        assert service.get_reviews() == []
+
+    def test_create_reviews_validates_once(self, service):
+        with patch.object(service.analyzer, "analyze") as analyze:
+            service.create_review("Хороший продукт")
+            service.create_reviews(["Отличный продукт", "Ужасный продукт"])
+            analyze.assert_not_called()
+
     def test_get_reviews(self, service):
         service.create_review("Позитивный отзыв")
         service.create_review("Негативный отзыв")
@@ -141,6 +278,35 @@ class TestFlaskEndpoints:
         assert "id" in data
         assert data["text"] == "Отличный продукт!"
 
+    def test_add_review_response_is_orjson(self, client):
+        response = client.post(
+            "/reviews",
+            data=json.dumps({"text": "Отличный продукт!"}),
+            content_type='application/json'
+        )
+        assert response.mimetype == "application/json"
+        assert "Отличный продукт!".encode("utf-8") in response.data
+
+    def test_json_provider_defaults(self):
+        assert app.json.dumps({"b": 1, "a": 2}) == '{"b":1,"a":2}'
+
+    def test_json_provider_settings_apply_to_responses(self, client):
+        response = client.post(
+            "/reviews",
+            data=json.dumps({"text": "Отличный продукт!"}),
+            content_type='application/json'
+        )
+        assert list(json.loads(response.data)) == ["id", "text", "sentiment", "created_at"]
+        assert b"\n" not in response.data
+
+        with patch.object(app.json, "sort_keys", True):
+            response = client.post(
+                "/reviews",
+                data=json.dumps({"text": "Отличный продукт!"}),
+                content_type='application/json'
+            )
+        assert list(json.loads(response.data)) == ["created_at", "id", "sentiment", "text"]
+
     def test_add_review_invalid_content_type(self, client):
         response = client.post(
             "/reviews",
@@ -156,6 +322,25 @@ class TestFlaskEndpoints:
         )
         assert response.status_code == 400
 
+    def test_add_reviews_batch(self, client):
+        response = client.post(
+            "/reviews/batch",
+            data=json.dumps({"texts": ["Отличный продукт!", "Тестовый отзыв"]}),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert [r["text"] for r in data] == ["Отличный продукт!", "Тестовый отзыв"]
+        assert data[1]["id"] == data[0]["id"] + 1
+
+    def test_add_reviews_batch_missing_texts(self, client):
+        response = client.post(
+            "/reviews/batch",
+            data=json.dumps({"text": "value"}),
+            content_type='application/json'
+        )
+        assert response.status_code == 400
+
     def test_get_reviews(self, client):
         client.post(
             "/reviews",
@@ -169,6 +354,55 @@ class TestFlaskEndpoints:
         assert isinstance(data, list)
         assert len(data) >= 1
 
+    def test_get_reviews_etag(self, client):
+        response = client.get("/reviews")
+        assert response.status_code == 200
+        assert isinstance(json.loads(response.data), list)
+        etag = response.headers["ETag"]
+        assert etag.startswith('W/"')
+
+        with patch.object(ReviewService, "iter_reviews") as iter_reviews:
+            cached = client.get("/reviews", headers={"If-None-Match": etag})
+            iter_reviews.assert_not_called()
+        assert cached.status_code == 304
+        assert cached.data == b""
+        assert cached.headers["ETag"] == etag
+
+        client.post(
+            "/reviews",
+            data=json.dumps({"text": "Новый отзыв"}),
+            content_type='application/json'
+        )
+        fresh = client.get("/reviews", headers={"If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert fresh.headers["ETag"] != etag
+        assert json.loads(fresh.data)[-1]["text"] == "Новый отзыв"
+
+    def test_get_reviews_streams(self, client):
+        client.post(
+            "/reviews",
+            data=json.dumps({"text": "Тестовый отзыв"}),
+            content_type='application/json'
+        )
+
+        response = client.get("/reviews")
+        assert response.is_streamed
+        assert isinstance(json.loads(response.data), list)
+
+    @pytest.mark.parametrize("sentiment", ["поз", 'a"b'])
+    def test_get_reviews_etag_unsafe_sentiment(self, client, sentiment):
+        response = client.get("/reviews", query_string={"sentiment": sentiment})
+        assert response.status_code == 200
+        assert json.loads(response.data) == []
+        etag = response.headers["ETag"]
+        etag.encode("ascii")
+        assert etag.count('"') == 2
+
+        cached = client.get(
+            "/reviews", query_string={"sentiment": sentiment}, headers={"If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+
     def test_get_reviews_filtered(self, client):
         response = client.get("/reviews?sentiment=positive")
         assert response.status_code == 200